@@ -2,13 +2,40 @@ import os
 import re
 import shutil
 import sys
-from collections import defaultdict
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+import html
+import mmap
+import multiprocessing
 
 # 增加 CSV 模块用于可能的扩展，但在本逻辑中主要依赖 ADIF 解析
-# 增加 gc 用于手动垃圾回收，应对超大内存压力
+# 增加 gc 用于在批量读取期间暂停循环垃圾回收，读取结束后统一回收
 import gc
 
+# 预编译的正则表达式（模块级，避免每次调用时重复查找缓存）
+# ADIF 字段标签：<TAG:LEN> 或 <TAG:LEN:TYPE>
+_TAG_RE = re.compile(rb'<([^:>]+):(\d+)(?::[^>]+)?>')
+# 文件头结束符与记录结束符，不区分大小写
+_EOH_RE = re.compile(rb'<eoh>', re.IGNORECASE)
+_EOR_RE = re.compile(rb'<eor>', re.IGNORECASE)
+
+# 原始标签名 -> 大写标签名、短字段值 -> 解码后字符串 的缓存。
+# 标签名和 BAND/MODE 等短值在日志中反复出现，缓存后无需每次解码，
+# 所有记录也共享同一个字符串对象，节省内存。缓存条目数有上限，防止异常数据撑大内存
+_TAG_NAME_CACHE = {}
+_SHORT_VALUE_CACHE = {}
+_SHORT_VALUE_LEN = 8
+_DECODE_CACHE_LIMIT = 4096
+
+# 超过该大小的文件使用 mmap 读取，较小的文件分块读取即可
+_MMAP_THRESHOLD = 4 * 1024 * 1024
+# 分块读取时每次读入的字节数（与 mmap 阈值相同，走分块路径的小文件一次即可读完）
+_READ_CHUNK_SIZE = 4 * 1024 * 1024
+# 只在文件开头这一范围内查找 <EOH>，超出仍未找到则视为没有文件头
+_HEADER_SCAN_LIMIT = 10 * 1024 * 1024
+
 def get_base_path():
     """
     获取脚本或 EXE 的实际运行路径。
@@ -18,23 +45,117 @@ def get_base_path():
     else:
         return os.path.dirname(os.path.abspath(__file__))
 
+# 每月之前的累计天数（平年）及每月天数，用于整数日期换算
+_MONTH_CUM_DAYS = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+# 0001-01-01 到 1970-01-01 的天数
+_EPOCH_DAYS = 719162
+
+# 查重时间窗口（秒）：同一 (DX_Call, Band, Mode) 的 QSO 时间差在 15 分钟内视为重复
+DUPE_WINDOW = 900
+
+# QSO_DATE -> 自 1970-01-01 起的天数（无效日期为 None）。
+# 一份日志通常只涉及少数几个日期，缓存后每条记录只需一次字典查找
+_DATE_DAYS_CACHE = {}
+
+def _date_to_days(date_str):
+    """将 YYYYMMDD 换算为自 1970-01-01 起的天数；日期无效时返回 None"""
+    if len(date_str) != 8 or not (date_str.isascii() and date_str.isdigit()):
+        return None
+    
+    year = int(date_str[0:4])
+    month = int(date_str[4:6])
+    day = int(date_str[6:8])
+    
+    is_leap = year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return None
+    if day > _MONTH_DAYS[month - 1] + (1 if is_leap and month == 2 else 0):
+        return None
+    
+    y = year - 1
+    return (y * 365 + y // 4 - y // 100 + y // 400
+            + _MONTH_CUM_DAYS[month - 1] + (1 if is_leap and month > 2 else 0)
+            + day - 1 - _EPOCH_DAYS)
+
 def get_qso_time(rec):
     """
-    从记录中提取 datetime 对象。
+    从记录中提取 QSO 时间，返回自 1970-01-01 00:00:00 起的秒数 (int)。
     合并 QSO_DATE 和 TIME_ON。
+    直接对数字切片做整数运算，不经过 datetime.strptime；日期或时间无效时返回 None。
     """
     date_str = rec.get('QSO_DATE', '')  # YYYYMMDD
+    try:
+        days = _DATE_DAYS_CACHE[date_str]
+    except KeyError:
+        days = _date_to_days(date_str)
+        if len(_DATE_DAYS_CACHE) < _DECODE_CACHE_LIMIT:
+            _DATE_DAYS_CACHE[date_str] = days
+    if days is None:
+        return None
+    
     # TIME_ON 可能是 4位或6位，补全为6位
     time_str = rec.get('TIME_ON', '000000')
     if len(time_str) < 6:
         time_str = time_str.ljust(6, '0')
     else:
         time_str = time_str[:6]
+    if not (time_str.isascii() and time_str.isdigit()):
+        return None
     
-    try:
-        return datetime.strptime(f"{date_str}{time_str}", "%Y%m%d%H%M%S")
-    except:
+    hour = int(time_str[0:2])
+    minute = int(time_str[2:4])
+    second = int(time_str[4:6])
+    if hour > 23 or minute > 59 or second > 59:
         return None
+    
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+# 字段布局缓存：标签名元组 -> {标签名: 下标}。
+# 同一日志软件导出的记录字段顺序基本一致，所有记录共用同一份布局字典
+_SCHEMA_CACHE = {}
+
+def _get_schema(names):
+    """返回与标签名元组对应的共享布局字典"""
+    schema = _SCHEMA_CACHE.get(names)
+    if schema is None:
+        schema = {name: i for i, name in enumerate(names)}
+        if len(_SCHEMA_CACHE) < _DECODE_CACHE_LIMIT:
+            _SCHEMA_CACHE[names] = schema
+    return schema
+
+class QsoRecord:
+    """
+    单条 QSO 记录。
+    去重要用的规范化字段在入库时一次性算好，存放在 __slots__ 中：
+    固定布局，访问快、占用小，也不必混在 ADIF 字段字典里、写出时再过滤掉。
+    原始 ADIF 字段按"共享布局 + 值元组"保存：标签名到下标的映射由字段顺序相同的记录共用，
+    每条记录只持有一个值元组，比每条记录一个字典省下大部分内存。
+    """
+    __slots__ = ('schema', 'values', 'source_file', 'call', 'band', 'mode', 'qso_time')
+
+    def __init__(self, fields, source_file):
+        self.schema = _get_schema(tuple(fields))
+        self.values = tuple(fields.values())
+        self.source_file = source_file
+        # 日志中的呼号、波段、模式绝大多数本来就是大写，此时直接复用原字符串
+        # （BAND/MODE 还是解码缓存中的共享对象），只有含小写字母时才 upper() 生成新串
+        call = fields.get('CALL', '')
+        band = fields.get('BAND', '')
+        mode = fields.get('MODE', '')
+        self.call = call if call.isupper() else call.upper()
+        self.band = band if band.isupper() else band.upper()
+        self.mode = mode if mode.isupper() else mode.upper()
+        self.qso_time = get_qso_time(fields)
+
+    def get(self, tag, default=None):
+        """读取原始 ADIF 字段，用法同 dict.get"""
+        i = self.schema.get(tag)
+        return default if i is None else self.values[i]
+
+    def items(self):
+        """按原始顺序返回 (标签名, 值) 对，用法同 dict.items"""
+        return zip(self.schema, self.values)
 
 class AdifParser:
     """
@@ -46,39 +167,90 @@ class AdifParser:
     def __init__(self, file_path):
         self.file_path = file_path
         self.file_name = os.path.basename(file_path)
-        # 正则表达式改为 bytes 类型，匹配二进制数据
-        self.tag_pattern = re.compile(rb'<([^:>]+):(\d+)(?::[^>]+)?>', re.IGNORECASE)
 
-    def _parse_single_record(self, raw_data):
-        """解析单条 ADIF 字节流为字典"""
-        if not raw_data.strip():
-            return None
-            
-        record_data = {}
-        record_data['_SOURCE_FILE'] = self.file_name
+    def _split_fields(self, raw_data):
+        """
+        将单条记录切分为 [(标签名字节, 值字节), ...]。
+        用一次 _TAG_RE.split 在 C 层完成全部切分，结果形如
+        [前导, 标签名, 长度, 标签之后的内容, 标签名, 长度, 标签之后的内容, ...]，
+        每个值就是"标签之后的内容"的前 N 个字节。
+        """
+        parts = _TAG_RE.split(raw_data)
+        fields = []
+        for i in range(1, len(parts), 3):
+            value_len = int(parts[i + 1])
+            following = parts[i + 2]
+            if len(following) < value_len:
+                # 值比到下一个标签之间的内容还长：值里含有形似标签的文本，或长度越界。
+                # 罕见情况，退回逐个标签扫描的精确路径
+                return self._scan_fields(raw_data)
+            fields.append((parts[i], following[:value_len]))
+        return fields
+
+    def _scan_fields(self, raw_data):
+        """
+        逐个标签扫描单条记录，返回 [(标签名字节, 值字节), ...]。
+        手写的字节扫描器：用 bytes.find 定位 '<' 和 '>'，再按 ':' 拆分标签头，
+        规则与 _TAG_RE 相同。每个值之后才继续查找下一个标签，因此值里含有 '<' 也能正确处理。
+        """
+        fields = []
+        find = raw_data.find
         
-        # 指针位置
+        # 指针位置：上一个字段值的结束处
         pos = 0
         data_len = len(raw_data)
         
-        while pos < data_len:
-            # 查找下一个标签的起始
-            tag_match = self.tag_pattern.search(raw_data, pos)
-            if not tag_match:
+        while True:
+            # 查找下一个标签的起止位置
+            lt = find(b'<', pos)
+            if lt == -1:
+                break
+            gt = find(b'>', lt + 1)
+            if gt == -1:
                 break
             
-            # 标签名是 ASCII，直接解码
-            tag_name = tag_match.group(1).decode('ascii', errors='ignore').upper()
-            value_len = int(tag_match.group(2))
+            # 标签头形如 NAME:LEN 或 NAME:LEN:TYPE
+            parts = raw_data[lt + 1:gt].split(b':', 2)
+            if (len(parts) < 2 or not parts[0] or not parts[1].isdigit()
+                    or (len(parts) == 3 and not parts[2])):
+                # 不是合法标签（如值以外的零散 '<'），从下一个字符继续查找
+                pos = lt + 1
+                continue
             
             # 数据值的起始位置
-            value_start = tag_match.end()
-            value_end = value_start + value_len
+            value_start = gt + 1
+            value_end = value_start + int(parts[1])
             
-            # 提取值
-            if value_end <= data_len:
-                value_bytes = raw_data[value_start:value_end]
-                
+            if value_end > data_len:
+                # 异常情况：长度超出剩余字符串
+                break
+            
+            fields.append((parts[0], raw_data[value_start:value_end]))
+            pos = value_end
+        return fields
+
+    def _parse_single_record(self, raw_data):
+        """解析单条 ADIF 字节流为 QsoRecord"""
+        # 快速预过滤：不含 '<' 的片段（空白、换行等）不可能有标签，
+        # 用 C 层的子串查找直接排除，无需 strip() 复制也无需进入正则引擎
+        if b'<' not in raw_data:
+            return None
+            
+        record_data = {}
+        tag_cache = _TAG_NAME_CACHE
+        value_cache = _SHORT_VALUE_CACHE
+        
+        for raw_tag, value_bytes in self._split_fields(raw_data):
+            # 标签名是 ASCII，直接在字节上转大写后解码；同一原始标签名只解码一次
+            tag_name = tag_cache.get(raw_tag)
+            if tag_name is None:
+                tag_name = raw_tag.upper().decode('ascii', errors='ignore')
+                if len(tag_cache) < _DECODE_CACHE_LIMIT:
+                    tag_cache[raw_tag] = tag_name
+            
+            # 短值（波段、模式、日期、信号报告等）大量重复，直接复用已解码的字符串
+            value_str = value_cache.get(value_bytes)
+            if value_str is None:
                 # 【关键修复】智能解码
                 # 优先尝试 UTF-8，失败则尝试 GB18030 (覆盖 GBK/GB2312)
                 try:
@@ -88,92 +260,271 @@ class AdifParser:
                         value_str = value_bytes.decode('gb18030')
                     except UnicodeDecodeError:
                         value_str = value_bytes.decode('utf-8', errors='replace')
+                if len(value_bytes) <= _SHORT_VALUE_LEN and len(value_cache) < _DECODE_CACHE_LIMIT:
+                    value_cache[value_bytes] = value_str
 
-                record_data[tag_name] = value_str
-                pos = value_end
-            else:
-                # 异常情况：长度超出剩余字符串
-                break
+            record_data[tag_name] = value_str
                 
-        if len(record_data) > 1:
-            return record_data
+        if record_data:
+            return QsoRecord(record_data, self.file_name)
         return None
 
+    def _iter_records(self, data, start=0):
+        """
+        从 data[start:] 中逐条切出以 <EOR> 结尾的完整记录并解析。
+        一次 finditer 扫描找出所有记录边界，不复制剩余数据。
+        生成器的返回值是最后一个 <EOR> 之后的位置，即未完成部分的起点。
+        """
+        # 通过 memoryview 切片不产生中间副本（bytearray 切片本身会复制一次），
+        # 每条记录只在转成 bytes 时复制一次。生成器结束时释放视图，之后调用方才能截断缓冲
+        with memoryview(data) as view:
+            for eor_match in _EOR_RE.finditer(data, start):
+                # 提取一条完整的原始记录 (bytes)
+                raw_rec = bytes(view[start:eor_match.start()])
+                start = eor_match.end()
+
+                # 解析该记录
+                parsed_rec = self._parse_single_record(raw_rec)
+                if parsed_rec:
+                    yield parsed_rec
+        return start
+
     def stream_records(self):
         """
         生成器：逐条读取并返回记录。
-        使用缓冲区处理跨块的记录。
+        大文件使用 mmap 整体映射，小文件使用缓冲区分块读取。
         【修复】使用二进制读取，避免编码导致的偏移问题。
         """
-        buffer = b""  # 使用字节缓冲
-        chunk_size = 1024 * 1024 * 2  # 2MB chunks
-        
         try:
-            # 以 'rb' (二进制) 读取，不做任何编码转换
-            with open(self.file_path, 'rb') as f:
-                # 尝试跳过 Header，找到第一个 <EOH>
-                header_found = False
-                
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
-                        break
-                    
-                    buffer += chunk
-                    
-                    if not header_found:
-                        # 查找 header 结束符 (二进制查找)
-                        lower_buf = buffer.lower()
-                        eoh_idx = lower_buf.find(b'<eoh>')
-                        if eoh_idx != -1:
-                            buffer = buffer[eoh_idx+5:] # 跳过 <EOH>
-                            header_found = True
-                        else:
-                            # 如果 buffer 太大还没找到 header，可能是纯记录文件或异常
-                            if len(buffer) > 10 * 1024 * 1024: 
-                                header_found = True # 强制开始解析
-                            continue
-
-                    # 处理记录分隔符 <EOR>
-                    while True:
-                        # 查找 <EOR> 的位置
-                        lower_buf = buffer.lower()
-                        eor_idx = lower_buf.find(b'<eor>')
-                        
-                        if eor_idx == -1:
-                            break
-                        
-                        # 提取一条完整的原始记录 (bytes)
-                        raw_rec = buffer[:eor_idx]
-                        # 移动 buffer 指针
-                        buffer = buffer[eor_idx+5:]
-                        
-                        # 解析该记录
-                        parsed_rec = self._parse_single_record(raw_rec)
-                        if parsed_rec:
-                            yield parsed_rec
-                            
-                # 处理文件末尾可能剩余的内容
-                if buffer.strip():
-                     parsed_rec = self._parse_single_record(buffer)
-                     if parsed_rec:
-                         yield parsed_rec
-                         
+            if os.path.getsize(self.file_path) >= _MMAP_THRESHOLD:
+                yield from self._stream_mmap()
+            else:
+                yield from self._stream_buffered()
         except Exception as e:
             print(f"读取文件 {self.file_name} 时出错: {e}")
 
+    def _stream_mmap(self):
+        """
+        将整个文件映射到内存，由操作系统按需换页。
+        正则直接在映射上扫描，无需分块拼接，也不存在记录跨块的问题。
+        """
+        with open(self.file_path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # 无法映射（空文件、特殊文件系统等），退回分块读取
+                yield from self._stream_buffered()
+                return
+
+            with mm:
+                # 跳过 Header：只在文件开头一定范围内查找 <EOH>，找不到则视为纯记录文件
+                eoh_match = _EOH_RE.search(mm, 0, _HEADER_SCAN_LIMIT)
+                start = eoh_match.end() if eoh_match else 0
+
+                start = yield from self._iter_records(mm, start)
+
+                # 处理文件末尾可能剩余的内容
+                tail = mm[start:]
+                if b'<' in tail:
+                    parsed_rec = self._parse_single_record(tail)
+                    if parsed_rec:
+                        yield parsed_rec
+
+    def _stream_buffered(self):
+        """
+        分块读取文件，使用缓冲区处理跨块的记录。
+        """
+        buffer = bytearray()  # 可原地增删的字节缓冲
+        chunk_size = _READ_CHUNK_SIZE
+
+        # 以 'rb' (二进制) 读取，不做任何编码转换；只有字段值在解析时才解码
+        # 每次都是大块读取，关闭 Python 层的读缓冲（buffering=0），
+        # 数据由系统调用直接读入，不再经过一次中间缓冲的拷贝
+        with open(self.file_path, 'rb', buffering=0) as f:
+            # 尝试跳过 Header，找到第一个 <EOH>
+            header_found = False
+            # 已查找过的位置：每次只从新读入的数据开始找，
+            # 回退 4 字节以免漏掉跨块的 <EOH>，不必反复扫描整个缓冲区
+            header_scan_pos = 0
+
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+
+                buffer += chunk
+
+                if not header_found:
+                    # 查找 header 结束符 (二进制查找)
+                    eoh_match = _EOH_RE.search(buffer, max(0, header_scan_pos - 4), _HEADER_SCAN_LIMIT)
+                    header_scan_pos = len(buffer)
+                    if eoh_match:
+                        del buffer[:eoh_match.end()] # 跳过 <EOH>
+                        header_found = True
+                    else:
+                        # 如果 buffer 太大还没找到 header，可能是纯记录文件或异常
+                        if len(buffer) > _HEADER_SCAN_LIMIT:
+                            header_found = True # 强制开始解析
+                        continue
+
+                # 处理记录分隔符 <EOR>，之后原地丢弃已处理的数据，只保留未完成的尾部
+                last_end = yield from self._iter_records(buffer)
+                del buffer[:last_end]
+
+            if not header_found:
+                # 文件读完仍未找到 <EOH>：与 mmap 路径一致，视为无文件头的纯记录文件
+                last_end = yield from self._iter_records(buffer)
+                del buffer[:last_end]
+
+            # 处理文件末尾可能剩余的内容
+            # 转成 bytes 再解析：解码缓存以字节串为键，bytearray 切片不可哈希
+            if b'<' in buffer:
+                 parsed_rec = self._parse_single_record(bytes(buffer))
+                 if parsed_rec:
+                     yield parsed_rec
+
+# 原始 (STATION_CALLSIGN, MY_GRIDSQUARE) -> (分组键, 是否缺失呼号) 的缓存。
+# 日志中不同的呼号/网格组合通常只有几个，缓存后每条记录只需一次字典查找，
+# 不必反复 strip/upper/replace 和清洗网格字符
+_GROUP_KEY_CACHE = {}
+
+def get_group_key(raw_callsign, raw_grid):
+    """
+    根据 STATION_CALLSIGN 和 MY_GRIDSQUARE 生成分组键 "呼号-网格"。
+    返回 (group_key, call_missing)，call_missing 表示记录缺失呼号。
+    """
+    cache_key = (raw_callsign, raw_grid)
+    cached = _GROUP_KEY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 处理呼号部分
+    call_missing = not raw_callsign or not raw_callsign.strip()
+    if call_missing:
+        call_part = 'UNKNOWN'
+    else:
+        call_part = raw_callsign.strip().upper().replace('/', '_')
+    
+    # 处理网格部分
+    if raw_grid and raw_grid.strip():
+        grid_part = raw_grid.strip().upper()
+        # 简单清洗网格字符，防止特殊字符导致文件名错误 (保留数字和字母)
+        grid_part = "".join([c for c in grid_part if c.isalnum()])
+        # 组合键名：呼号-网格
+        group_key = f"{call_part}-{grid_part}"
+    else:
+        # 缺失网格时的命名
+        group_key = f"{call_part}-NOGRID"
+
+    result = (group_key, call_missing)
+    # 与其他缓存一样限制条目数，防止异常数据撑大内存
+    if len(_GROUP_KEY_CACHE) < _DECODE_CACHE_LIMIT:
+        _GROUP_KEY_CACHE[cache_key] = result
+    return result
+
+def parse_file_worker(file_path):
+    """
+    进程池的工作函数：完整解析一个文件，返回记录列表。
+    必须定义在模块顶层，才能被子进程 pickle 调用。
+    """
+    return list(AdifParser(file_path).stream_records())
+
+def _is_large_file(file_path):
+    """大文件（走 mmap 的文件）在主进程中流式解析，不整份物化后传回"""
+    try:
+        return os.path.getsize(file_path) >= _MMAP_THRESHOLD
+    except OSError:
+        # 读取失败交给解析器自己报告
+        return False
+
+def iter_file_records(file_paths):
+    """
+    按输入顺序依次产出每个文件的记录（可迭代对象）。
+    多个小文件时使用进程池并行解析（解析是 CPU 密集型，各文件互不依赖），
+    结果仍按提交顺序交回主进程，保证去重结果与串行处理完全一致。
+    同时在途的任务不超过工作进程数，已解析完、等待主进程取走的记录列表也就有上限；
+    达到 mmap 阈值的大文件不进进程池，轮到它时在主进程中流式读取，不在内存中物化整份记录。
+    只有一个小文件或单核时直接流式读取，节省进程启动和结果传输的开销。
+    """
+    large = [_is_large_file(p) for p in file_paths]
+    small_count = len(file_paths) - sum(large)
+    workers = min(small_count, os.cpu_count() or 1, 61)  # Windows 上进程池最多 61 个工作进程
+    if workers <= 1:
+        for file_path in file_paths:
+            yield AdifParser(file_path).stream_records()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 滑动窗口：(文件路径, Future 或 None)，None 表示该文件在主进程中流式读取
+        pending = deque()
+        for file_path, is_large in zip(file_paths, large):
+            pending.append((file_path, None if is_large else executor.submit(parse_file_worker, file_path)))
+            if len(pending) >= workers:
+                yield _take_file_records(pending.popleft())
+        while pending:
+            yield _take_file_records(pending.popleft())
+
+def _take_file_records(entry):
+    """取出滑动窗口中一个文件的记录：进程池的结果，或主进程中的流式生成器"""
+    file_path, future = entry
+    if future is None:
+        return AdifParser(file_path).stream_records()
+    return future.result()
+
+# 查重报告中展示的字段。索引和重复项明细只保留这些字段，不保留整条记录
+_REPORT_FIELDS = ('CALL', 'BAND', 'MY_GRIDSQUARE', 'QSO_DATE', 'TIME_ON')
+
+# 如果重复项太多，截断报告以防止 HTML 过大卡死浏览器
+MAX_REPORT_ITEMS = 5000
+
+# 每个分组累计这么多条待写记录后追加写入一次输出文件
+_FLUSH_BATCH = 2000
+# 所有分组待写记录的总上限，超过后全部写出，限制分组很多时的内存占用
+_MAX_PENDING = 50000
+
+def index_entry(record, qso_time):
+    """
+    生成索引中代表一条已入库记录的精简元组：
+    (时间, 来源文件, 按 _REPORT_FIELDS 顺序的报告字段...)。
+    元组比字典小得多；报告用的字典只在真正发现重复时才由 entry_summary 构造
+    """
+    get = record.get
+    return (qso_time, record.source_file,
+            get('CALL', ''), get('BAND', ''), get('MY_GRIDSQUARE', ''),
+            get('QSO_DATE', ''), get('TIME_ON', ''))
+
+def entry_summary(entry):
+    """将索引元组还原为报告所需的字段字典"""
+    return dict(zip(_REPORT_FIELDS, entry[2:]))
+
 class FastDeduplicator:
     """
     高效去重管理器。
     使用哈希索引代替线性遍历，大幅提升大数据量下的速度。
+    非重复记录按分组小批量追加写入 output_dir 下的 Call-Grid.adi，
+    不在内存中保留全部记录，超大日志也不会耗尽内存。
     """
-    def __init__(self):
-        # 最终输出的记录列表： Key=GroupKey (Call-Grid), Value=[Records]
-        self.final_records = defaultdict(list)
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
         
-        # 索引用于快速查找： Key=GroupKey -> { (DX_Call, Band, Mode) -> [(TimeObj, Record)] }
-        self.lookup_index = defaultdict(lambda: defaultdict(list))
+        # 待写出的记录： Key=GroupKey (Call-Grid), Value=[Records]
+        self.pending_records = {}
+        self.pending_count = 0
+        # 各分组的非重复记录数（按分组首次出现的顺序）
+        self.record_counts = {}
+        # 已创建（写过文件头）的输出文件对应的分组
+        self.created_groups = set()
         
+        # 索引用于快速查找（扁平字典，单次哈希查找）：
+        # Key=(GroupKey, DX_Call, Band, Mode, TimeBucket) -> index_entry 元组 (TimeSeconds, 来源文件, 报告字段...)
+        # TimeBucket = 时间 // DUPE_WINDOW，查重时只需检查相邻的三个桶。
+        # 已入库的同键记录两两相差超过 DUPE_WINDOW，而同一桶内的时间差必然小于桶宽，
+        # 所以每个桶最多只有一条记录，直接存元组，不需要列表
+        self.lookup_index = {}
+        
+        # 重复项总数；明细只保留报告会展示的前 MAX_REPORT_ITEMS 条，
+        # 每条明细在加入时就格式化好（已转义）的 HTML 片段
+        self.dupe_count = 0
         self.dupe_details = []
 
     def process_record(self, record, group_key):
@@ -181,13 +532,13 @@ class FastDeduplicator:
         处理单条记录：判断重复，如果非重复则添加。
         group_key: 用于分组的唯一标识（如 "BI4KVO-PM01"）
         """
-        # 1. 提取关键比对字段
-        dx_call = record.get('CALL', '').upper()
-        band = record.get('BAND', '').upper()
-        mode = record.get('MODE', '').upper()
-        qso_time = get_qso_time(record)
+        # 1. 提取关键比对字段（解析时已规范化）
+        dx_call = record.call
+        band = record.band
+        mode = record.mode
+        qso_time = record.qso_time
         
-        if not dx_call or not qso_time:
+        if not dx_call or qso_time is None:
             # 缺少关键信息的记录，直接视为新记录添加，不参与严格去重
             self._add_to_storage(group_key, record, dx_call, band, mode, qso_time)
             return
@@ -196,155 +547,242 @@ class FastDeduplicator:
         # 只有相同 (DX_Call, Band, Mode) 的记录才值得比对时间
         # 注意：这里是在同一个 group_key (即同一个 呼号-网格) 内部查重
         # 不同网格的记录天然被视为不重复
-        key = (dx_call, band, mode)
-        candidates = self.lookup_index[group_key][key]
+        lookup_index = self.lookup_index
         
         is_dupe = False
-        existing_rec = None
+        existing_entry = None
         
-        for exist_time, exist_rec in candidates:
+        # 桶宽等于查重窗口，窗口内的记录只可能落在当前桶或左右相邻的桶中，
+        # 每条记录最多比对三次，与该 (DX_Call, Band, Mode) 的历史 QSO 数量无关
+        bucket = qso_time // DUPE_WINDOW
+        for b in (bucket - 1, bucket, bucket + 1):
+            entry = lookup_index.get((group_key, dx_call, band, mode, b))
             # 时间差在 15 分钟 (900秒) 内视为重复
-            diff = abs((qso_time - exist_time).total_seconds())
-            if diff <= 900:
+            if entry is not None and abs(qso_time - entry[0]) <= DUPE_WINDOW:
                 is_dupe = True
-                existing_rec = exist_rec
+                existing_entry = entry
                 break
         
         if is_dupe:
-            self.dupe_details.append({
-                'station': group_key,
-                'new_rec': record,
-                'old_rec': existing_rec
-            })
+            self.dupe_count += 1
+            if len(self.dupe_details) < MAX_REPORT_ITEMS:
+                # 呼号、网格和文件名都来自用户数据，写入报告前同样需要转义
+                self.dupe_details.append({
+                    'station': html.escape(group_key),
+                    'new_source': html.escape(record.source_file),
+                    'new_html': format_report_record(record),
+                    'old_source': html.escape(existing_entry[1]),
+                    'old_html': format_report_record(entry_summary(existing_entry))
+                })
         else:
             self._add_to_storage(group_key, record, dx_call, band, mode, qso_time)
 
     def _add_to_storage(self, group_key, record, dx_call, band, mode, qso_time):
-        """将记录加入存储和索引"""
-        self.final_records[group_key].append(record)
+        """将记录加入待写队列和索引"""
+        pending = self.pending_records.get(group_key)
+        if pending is None:
+            pending = self.pending_records[group_key] = []
+        pending.append(record)
+        self.pending_count += 1
+        self.record_counts[group_key] = self.record_counts.get(group_key, 0) + 1
         
         # 只有具备完整信息的才加入索引供后续比对
-        if dx_call and qso_time:
-            key = (dx_call, band, mode)
-            # 存储 (Time, Record) 元组
-            self.lookup_index[group_key][key].append((qso_time, record))
-
-def write_adif_file(file_path, records):
-    """写入 ADIF 文件"""
-    header = (
-        "ADIF Export from Python Tool (Splitted by Call-Grid)\r\n"
-        "Created by Gemini\r\n"
-        "<ADIF_VER:5>3.1.4\r\n"
-        "<EOH>\r\n"
-    )
-    
+        if dx_call and qso_time is not None:
+            key = (group_key, dx_call, band, mode, qso_time // DUPE_WINDOW)
+            # 按时间桶存储 (Time, 报告字段) 元组，整条记录写出后即可释放
+            self.lookup_index[key] = index_entry(record, qso_time)
+        
+        if len(pending) >= _FLUSH_BATCH:
+            self._flush_group(group_key)
+        elif self.pending_count >= _MAX_PENDING:
+            self.flush()
+
+    def _flush_group(self, group_key):
+        """将一个分组的待写记录追加到其输出文件"""
+        records = self.pending_records.pop(group_key, None)
+        if not records:
+            return
+        # 文件名直接使用组合好的 Key (Call-Grid.adi)；首次写入时创建文件并写入文件头
+        output_file = os.path.join(self.output_dir, f"{group_key}.adi")
+        # 写入失败时不标记为已创建，下一批仍以新建方式写入并带上文件头
+        if write_adif_file(output_file, records, append=group_key in self.created_groups):
+            self.created_groups.add(group_key)
+        self.pending_count -= len(records)
+
+    def flush(self):
+        """写出所有分组的待写记录，处理结束时必须调用"""
+        for group_key in list(self.pending_records):
+            self._flush_group(group_key)
+
+# 【修复】使用 gb18030 编码写入，以兼容常见的中文日志软件（如 N1MM 等默认非 UTF-8 环境）
+_OUT_ENCODING = 'gb18030'
+
+# 输出文件头（模块加载时编码一次，每个输出文件直接写入这份字节）
+_HEADER_BYTES = (
+    "ADIF Export from Python Tool (Splitted by Call-Grid)\r\n"
+    "Created by Gemini\r\n"
+    "<ADIF_VER:5>3.1.4\r\n"
+    "<EOH>\r\n"
+).encode(_OUT_ENCODING)
+
+# 非 ASCII 字段值 -> GB18030 编码后的字节长度
+_ENCODED_LEN_CACHE = {}
+
+def write_adif_file(file_path, records, append=False):
+    """
+    写入 ADIF 文件。append=True 时追加到已有文件末尾，不再写文件头。
+    返回是否写入成功。
+    """
     try:
-        # 【修复】使用 gb18030 编码写入，以兼容常见的中文日志软件（如 N1MM 等默认非 UTF-8 环境）
-        out_encoding = 'gb18030'
+        out_encoding = _OUT_ENCODING
         
-        with open(file_path, 'w', encoding=out_encoding) as f:
-            f.write(header)
-            for rec in records:
-                line = ""
-                for tag, val in rec.items():
-                    if tag.startswith('_'): continue 
-                    # 确保 val 是字符串
-                    val_str = str(val)
-                    # 【修复】计算字节长度时必须使用与文件写入相同的编码
-                    line += f"<{tag}:{len(val_str.encode(out_encoding))}>{val_str} "
-                f.write(line + "<EOR>\r\n")
+        # 整批记录的文本片段先收集到一个列表里，join 后只编码一次，再以二进制方式写出：
+        # 省去文本模式下逐条 write 的编码器调用，也避免 Windows 下 '\r\n' 被再次转换成 '\r\r\n'
+        parts = []
+        append_part = parts.append
+        for rec in records:
+            for tag, val in rec.items():
+                # 确保 val 是字符串
+                val_str = str(val)
+                # 【修复】计算字节长度时必须使用与文件写入相同的编码
+                # 纯 ASCII 值（绝大多数字段）在 GB18030 中每字符占 1 字节，直接取长度，
+                # 免去为求长度而编码一次的开销
+                # 非 ASCII 值（如中文 QTH/备注）通常在同一台站的记录间重复，字节长度也做缓存
+                if val_str.isascii():
+                    val_len = len(val_str)
+                else:
+                    val_len = _ENCODED_LEN_CACHE.get(val_str)
+                    if val_len is None:
+                        val_len = len(val_str.encode(out_encoding))
+                        if len(_ENCODED_LEN_CACHE) < _DECODE_CACHE_LIMIT:
+                            _ENCODED_LEN_CACHE[val_str] = val_len
+                append_part(f"<{tag}:{val_len}>{val_str} ")
+            append_part("<EOR>\r\n")
+        
+        with open(file_path, 'ab' if append else 'wb') as f:
+            if not append:
+                f.write(_HEADER_BYTES)
+            f.write("".join(parts).encode(out_encoding))
+        return True
     except Exception as e:
         print(f"写入文件 {file_path} 失败: {e}")
+        return False
+
+# 报告中单条记录的 HTML 模板（模块级常量，避免每行重新构造嵌套 f-string）
+_REPORT_RECORD_TPL = (
+    "<span class='tag'>CALL:</span> <span class='val'>{call}</span> | "
+    "<span class='tag'>BAND:</span> <span class='val'>{band}</span> | "
+    "<span class='tag'>GRID:</span> <span class='val'>{grid}</span><br>"
+    "<span class='tag'>TIME:</span> <span class='val'>{date} {time}</span>"
+)
 
-def generate_html_report(report_path, dupe_details):
-    """生成 HTML 报告"""
+def format_report_record(r):
+    """将记录的关键字段格式化为报告中的 HTML 片段，字段值经过 HTML 转义"""
+    if not r: return "无法读取记录"
+    return _REPORT_RECORD_TPL.format(
+        call=html.escape(r.get('CALL', '')),
+        band=html.escape(r.get('BAND', '')),
+        grid=html.escape(r.get('MY_GRIDSQUARE', '')),
+        date=html.escape(r.get('QSO_DATE', '')),
+        time=html.escape(r.get('TIME_ON', '')),
+    )
+
+def generate_html_report(report_path, dupe_details, dupe_count):
+    """
+    生成 HTML 报告。
+    dupe_details 为去重器保留的前 MAX_REPORT_ITEMS 条明细，dupe_count 为重复项总数。
+    """
     if not dupe_details:
         return
 
-    # 如果重复项太多，截断报告以防止 HTML 过大卡死浏览器
-    MAX_REPORT_ITEMS = 5000
     display_items = dupe_details[:MAX_REPORT_ITEMS]
     
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>ADIF Deduplication Visual Report</title>
-        <style>
-            body {{ font-family: sans-serif; background: #f4f7f6; padding: 20px; }}
-            h1 {{ color: #2c3e50; }}
-            .summary {{ background: white; padding: 15px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }}
-            table {{ width: 100%; border-collapse: collapse; background: white; box-shadow: 0 2px 15px rgba(0,0,0,0.1); }}
-            th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-            th {{ background-color: #34495e; color: white; }}
-            tr:hover {{ background-color: #f1f1f1; }}
-            .diff-container {{ display: flex; gap: 10px; font-size: 0.85em; }}
-            .rec-box {{ background: #ebf5fb; padding: 10px; border-radius: 4px; border: 1px solid #aed6f1; flex: 1; }}
-            .existing {{ background: #fef9e7; border-color: #f9e79f; }}
-            .tag {{ font-weight: bold; color: #7f8c8d; }}
-            .val {{ color: #2980b9; }}
-            .file-info {{ display: block; margin-bottom: 8px; font-weight: bold; color: #2c3e50; border-bottom: 1px dashed #ccc; padding-bottom: 4px; }}
-            .warning {{ color: red; font-weight: bold; margin-top: 10px; }}
-        </style>
-    </head>
-    <body>
-        <h1>ADIF 查重比对报告</h1>
-        <div class="summary">
-            <p><strong>生成时间:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-            <p><strong>重复条目总数:</strong> {len(dupe_details)}</p>
-            {f'<p class="warning">注意：报告仅显示前 {MAX_REPORT_ITEMS} 条，以免文件过大。</p>' if len(dupe_details) > MAX_REPORT_ITEMS else ''}
-        </div>
-        <table>
-            <thead>
-                <tr>
-                    <th>序号</th>
-                    <th>电台呼号-网格</th>
-                    <th>比对详情 (重复项 vs 原始项)</th>
-                </tr>
-            </thead>
-            <tbody>
-    """
-    
-    for i, d in enumerate(display_items, 1):
-        new_rec = d['new_rec']
-        old_rec = d['old_rec']
+    # 边生成边写入文件，不在内存中拼接整份报告；使用 1MB 缓冲合并小块写入
+    with open(report_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>ADIF Deduplication Visual Report</title>
+            <style>
+                body {{ font-family: sans-serif; background: #f4f7f6; padding: 20px; }}
+                h1 {{ color: #2c3e50; }}
+                .summary {{ background: white; padding: 15px; border-radius: 8px; margin-bottom: 20px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }}
+                table {{ width: 100%; border-collapse: collapse; background: white; box-shadow: 0 2px 15px rgba(0,0,0,0.1); }}
+                th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
+                th {{ background-color: #34495e; color: white; }}
+                tr:hover {{ background-color: #f1f1f1; }}
+                .diff-container {{ display: flex; gap: 10px; font-size: 0.85em; }}
+                .rec-box {{ background: #ebf5fb; padding: 10px; border-radius: 4px; border: 1px solid #aed6f1; flex: 1; }}
+                .existing {{ background: #fef9e7; border-color: #f9e79f; }}
+                .tag {{ font-weight: bold; color: #7f8c8d; }}
+                .val {{ color: #2980b9; }}
+                .file-info {{ display: block; margin-bottom: 8px; font-weight: bold; color: #2c3e50; border-bottom: 1px dashed #ccc; padding-bottom: 4px; }}
+                .warning {{ color: red; font-weight: bold; margin-top: 10px; }}
+            </style>
+        </head>
+        <body>
+            <h1>ADIF 查重比对报告</h1>
+            <div class="summary">
+                <p><strong>生成时间:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p><strong>重复条目总数:</strong> {dupe_count}</p>
+                {f'<p class="warning">注意：报告仅显示前 {MAX_REPORT_ITEMS} 条，以免文件过大。</p>' if dupe_count > MAX_REPORT_ITEMS else ''}
+            </div>
+            <table>
+                <thead>
+                    <tr>
+                        <th>序号</th>
+                        <th>电台呼号-网格</th>
+                        <th>比对详情 (重复项 vs 原始项)</th>
+                    </tr>
+                </thead>
+                <tbody>
+        """)
         
-        def format_rec(r):
-            if not r: return "无法读取记录"
-            return f"<span class='tag'>CALL:</span> <span class='val'>{r.get('CALL','')}</span> | " \
-                   f"<span class='tag'>BAND:</span> <span class='val'>{r.get('BAND','')}</span> | " \
-                   f"<span class='tag'>GRID:</span> <span class='val'>{r.get('MY_GRIDSQUARE','')}</span><br>" \
-                   f"<span class='tag'>TIME:</span> <span class='val'>{r.get('QSO_DATE','')} {r.get('TIME_ON','')}</span>"
-
-        html_content += f"""
-                <tr>
-                    <td>{i}</td>
-                    <td><strong>{d['station']}</strong></td>
-                    <td>
-                        <div class="diff-container">
-                            <div class="rec-box">
-                                <span class="file-info">重复项来源: {new_rec.get('_SOURCE_FILE', '未知')}</span>
-                                {format_rec(new_rec)}
-                            </div>
-                            <div class="rec-box existing">
-                                <span class="file-info">原始项来源: {old_rec.get('_SOURCE_FILE', '未知')}</span>
-                                {format_rec(old_rec)}
+        for i, d in enumerate(display_items, 1):
+            f.write(f"""
+                    <tr>
+                        <td>{i}</td>
+                        <td><strong>{d['station']}</strong></td>
+                        <td>
+                            <div class="diff-container">
+                                <div class="rec-box">
+                                    <span class="file-info">重复项来源: {d['new_source']}</span>
+                                    {d['new_html']}
+                                </div>
+                                <div class="rec-box existing">
+                                    <span class="file-info">原始项来源: {d['old_source']}</span>
+                                    {d['old_html']}
+                                </div>
                             </div>
-                        </div>
-                    </td>
-                </tr>
-        """
+                        </td>
+                    </tr>
+            """)
+
+        f.write("""
+                </tbody>
+            </table>
+        </body>
+        </html>
+        """)
 
-    html_content += """
-            </tbody>
-        </table>
-    </body>
-    </html>
+# 支持的 ADIF 扩展名（小写比较，兼容 .ADI/.Adif 等大小写变体）
+_ADIF_EXTS = frozenset(('.adi', '.adif'))
+
+def list_adif_files(directory):
     """
-    
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    列出目录下的 ADIF 文件名 (.adi/.adif)。
+    使用 os.scandir：目录项自带文件类型信息，判断是否为普通文件无需额外 stat；
+    只对扩展名部分做小写比较，不复制整个文件名。
+    """
+    with os.scandir(directory) as entries:
+        return [e.name for e in entries
+                if os.path.splitext(e.name)[1].lower() in _ADIF_EXTS and e.is_file()]
+
+# 进度条刷新节流：每 8192 条记录检查一次时间，至少间隔 0.25 秒才刷新
+_PROGRESS_MASK = 0x1FFF
+_PROGRESS_INTERVAL = 0.25
 
 def process_adi_files():
     current_dir = get_base_path()
@@ -361,14 +799,12 @@ def process_adi_files():
         os.makedirs(done_dir)
 
     # 初始化去重器
-    deduplicator = FastDeduplicator()
+    deduplicator = FastDeduplicator(output_dir)
     unknown_sources = defaultdict(int)
     
     # 2. 扫描文件
-    # 支持 .adi, .adif 以及大写变体
-    valid_exts = ('.adi', '.adif')
-    root_files = [f for f in os.listdir(current_dir) if f.lower().endswith(valid_exts)]
-    done_files = [os.path.join('done', f) for f in os.listdir(done_dir) if f.lower().endswith(valid_exts)]
+    root_files = list_adif_files(current_dir)
+    done_files = [os.path.join('done', f) for f in list_adif_files(done_dir)]
     all_target_files = root_files + done_files
     
     if not all_target_files:
@@ -383,41 +819,32 @@ def process_adi_files():
     total_qso_count = 0
     file_count = 0
     
-    for file_path_rel in all_target_files:
+    # 批量读取期间暂停循环垃圾回收：记录对象不含循环引用，
+    # 而每次回收都要遍历所有存活对象，大量记录时反复回收代价很高
+    gc.disable()
+    
+    # 进度条按时间节流：每 _PROGRESS_MASK+1 条记录才查看一次时钟，
+    # 距上次刷新超过 _PROGRESS_INTERVAL 秒才真正写出
+    last_progress = time.monotonic()
+    
+    # 各文件并行解析，按原顺序交给去重器
+    full_paths = [os.path.join(current_dir, f) for f in all_target_files]
+    for file_path_rel, file_records in zip(all_target_files, iter_file_records(full_paths)):
         file_count += 1
-        full_path = os.path.join(current_dir, file_path_rel)
         print(f"[{file_count}/{len(all_target_files)}] 正在读取: {file_path_rel}")
         
-        parser = AdifParser(full_path)
         rec_count = 0
         
-        # 使用流式读取
-        for rec in parser.stream_records():
+        for rec in file_records:
             rec_count += 1
             
             # --- 核心修改逻辑开始 ---
             
-            raw_callsign = rec.get('STATION_CALLSIGN')
-            raw_grid = rec.get('MY_GRIDSQUARE') # 获取网格
-
-            # 处理呼号部分
-            if not raw_callsign or not raw_callsign.strip():
-                call_part = 'UNKNOWN'
+            # 按 呼号-网格 生成分组键（结果已缓存）
+            group_key, call_missing = get_group_key(rec.get('STATION_CALLSIGN'), rec.get('MY_GRIDSQUARE'))
+            if call_missing:
                 # 记录缺失呼号的条数
                 unknown_sources[file_path_rel] += 1
-            else:
-                call_part = raw_callsign.strip().upper().replace('/', '_')
-            
-            # 处理网格部分
-            if raw_grid and raw_grid.strip():
-                grid_part = raw_grid.strip().upper()
-                # 简单清洗网格字符，防止特殊字符导致文件名错误 (保留数字和字母)
-                grid_part = "".join([c for c in grid_part if c.isalnum()])
-                # 组合键名：呼号-网格
-                group_key = f"{call_part}-{grid_part}"
-            else:
-                # 缺失网格时的命名
-                group_key = f"{call_part}-NOGRID"
             
             # --- 核心修改逻辑结束 ---
             
@@ -426,35 +853,36 @@ def process_adi_files():
             total_qso_count += 1
             
             # 实时进度条
-            if total_qso_count % 200 == 0:
-                sys.stdout.write(f"\r    └── 进度: 当前文件已读 {rec_count} 条 | 总计处理 {total_qso_count} 条")
-                sys.stdout.flush()
+            if not total_qso_count & _PROGRESS_MASK:
+                now = time.monotonic()
+                if now - last_progress >= _PROGRESS_INTERVAL:
+                    last_progress = now
+                    sys.stdout.write(f"\r    └── 进度: 当前文件已读 {rec_count} 条 | 总计处理 {total_qso_count} 条")
+                    sys.stdout.flush()
 
         # 单个文件处理完毕
         sys.stdout.write(f"\r    └── 完成: 当前文件已读 {rec_count} 条 | 总计处理 {total_qso_count} 条     \n")
         sys.stdout.flush()
-        
-        # 强制垃圾回收
-        gc.collect()
+
+    # 读取结束，恢复垃圾回收并统一回收一次
+    gc.enable()
+    gc.collect()
 
     print("-" * 50)
     print("所有文件读取完毕，正在导出合并结果...")
 
-    # 4. 导出文件
+    # 4. 导出文件（大部分记录在处理过程中已分批写出，这里写出剩余部分）
+    deduplicator.flush()
     exported_files = 0
-    for file_key, recs in deduplicator.final_records.items():
-        if not recs: continue
-        # 文件名直接使用组合好的 Key (Call-Grid.adi)
-        output_file = os.path.join(output_dir, f"{file_key}.adi")
-        write_adif_file(output_file, recs)
-        print(f" -> 生成: {file_key}.adi ({len(recs)} 条 QSO)")
+    for file_key, rec_count in deduplicator.record_counts.items():
+        print(f" -> 生成: {file_key}.adi ({rec_count} 条 QSO)")
         exported_files += 1
 
     # 5. 生成报告
-    if deduplicator.dupe_details:
-        print(f"\n正在生成重复项报告 ({len(deduplicator.dupe_details)} 条重复)...")
+    if deduplicator.dupe_count:
+        print(f"\n正在生成重复项报告 ({deduplicator.dupe_count} 条重复)...")
         report_path = os.path.join(output_dir, "dupe_report.html")
-        generate_html_report(report_path, deduplicator.dupe_details)
+        generate_html_report(report_path, deduplicator.dupe_details, deduplicator.dupe_count)
     else:
         print("\n太棒了！未发现重复记录。")
 
@@ -481,11 +909,13 @@ def process_adi_files():
     print(f"\n=== 处理完成 ===")
     print(f"处理文件数: {len(all_target_files)}")
     print(f"总读取记录: {total_qso_count}")
-    print(f"发现重复项: {len(deduplicator.dupe_details)}")
+    print(f"发现重复项: {deduplicator.dupe_count}")
     print(f"输出文件数: {exported_files}")
     print(f"结果目录: {output_dir}")
     
     input("\n按回车键退出程序...")
 
 if __name__ == "__main__":
+    # 打包为 EXE 后使用进程池必须调用
+    multiprocessing.freeze_support()
     process_adi_files()
\ No newline at end of file
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import log_merge
+
+
+class StreamRecordsTailTest(unittest.TestCase):
+    """文件末尾缺少 <EOR> 的记录也必须被解析出来"""
+
+    def _parse(self, data, mmap_threshold):
+        fd, path = tempfile.mkstemp(suffix='.adi')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        old_threshold = log_merge._MMAP_THRESHOLD
+        log_merge._MMAP_THRESHOLD = mmap_threshold
+        try:
+            return list(log_merge.AdifParser(path).stream_records())
+        finally:
+            log_merge._MMAP_THRESHOLD = old_threshold
+
+    def test_trailing_record_with_tag_like_value(self):
+        # 值中含有形似标签的文本，会走 _scan_fields 精确扫描路径
+        data = (b'<EOH>\r\n'
+                b'<CALL:4>BG5A <QSO_DATE:8>20230101 <TIME_ON:4>1200 <EOR>\r\n'
+                b'<CALL:4>BG5B <COMMENT:7>a<X:1>c <QSO_DATE:8>20230101 <TIME_ON:4>1300 ')
+        # 分块读取和 mmap 两条路径都要覆盖
+        for threshold in (1 << 40, 0):
+            records = self._parse(data, threshold)
+            self.assertEqual([r.get('CALL') for r in records], ['BG5A', 'BG5B'])
+            self.assertEqual(records[1].get('COMMENT'), 'a<X:1>c')
+
+
+class FlushGroupTest(unittest.TestCase):
+    """写入失败的分组不能被标记为已创建，否则后续批次会缺少文件头"""
+
+    def test_failed_write_keeps_header_for_next_batch(self):
+        output_dir = tempfile.mkdtemp()
+        dedup = log_merge.FastDeduplicator(output_dir)
+        record = log_merge.QsoRecord(
+            {'CALL': 'BG5A', 'QSO_DATE': '20230101', 'TIME_ON': '1200'}, 'x.adi')
+        output_file = os.path.join(output_dir, 'G.adi')
+
+        # 输出路径被目录占用，第一次写入失败
+        os.mkdir(output_file)
+        dedup.pending_records['G'] = [record]
+        dedup.pending_count = 1
+        dedup._flush_group('G')
+        self.assertNotIn('G', dedup.created_groups)
+
+        os.rmdir(output_file)
+        dedup.pending_records['G'] = [record]
+        dedup.pending_count = 1
+        dedup._flush_group('G')
+        self.assertIn('G', dedup.created_groups)
+        with open(output_file, 'rb') as f:
+            self.assertTrue(f.read().startswith(log_merge._HEADER_BYTES))
+        os.remove(output_file)
+        os.rmdir(output_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()